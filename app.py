@@ -7,6 +7,7 @@ from routes import bp
 from flask_swagger_ui import get_swaggerui_blueprint
 
 UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+CORS_ORIGINS = ["https://inforens-chatbot.vercel.app"]
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 load_dotenv()
@@ -32,13 +33,27 @@ def swagger_spec():
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['PERPLEXITY_API_KEY'] = os.getenv('PERPLEXITY_API_KEY')
 app.config['CONTENT_FILE'] = os.getenv('CONTENT_FILE')
+app.config['CONTENT_RELOAD_INTERVAL'] = float(os.getenv('CONTENT_RELOAD_INTERVAL', 5))
+app.config['CONTENT_INDEX_FILE'] = os.getenv('CONTENT_INDEX_FILE')
+app.config['CHATBOT_CONTEXT_MODE'] = os.getenv('CHATBOT_CONTEXT_MODE', 'retrieval')
+app.config['RETRIEVAL_TOP_K'] = int(os.getenv('RETRIEVAL_TOP_K', 8))
+app.config['RETRIEVAL_TOKEN_BUDGET'] = int(os.getenv('RETRIEVAL_TOKEN_BUDGET', 3000))
+app.config['RETRIEVAL_CHUNK_CHARS'] = int(os.getenv('RETRIEVAL_CHUNK_CHARS', 1200))
+app.config['ANSWER_CACHE_BACKEND'] = os.getenv('ANSWER_CACHE_BACKEND', 'memory')
+app.config['ANSWER_CACHE_URL'] = os.getenv('ANSWER_CACHE_URL')
+app.config['ANSWER_CACHE_TTL'] = int(os.getenv('ANSWER_CACHE_TTL', 86400))
+app.config['ANSWER_CACHE_MAX_ENTRIES'] = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1024))
+app.config['SIMILAR_CACHE_ENABLED'] = os.getenv('SIMILAR_CACHE_ENABLED', 'true').lower() == 'true'
+app.config['SIMILAR_CACHE_THRESHOLD'] = float(os.getenv('SIMILAR_CACHE_THRESHOLD', 0.9))
+app.config['SIMILAR_CACHE_MAX_ENTRIES'] = int(os.getenv('SIMILAR_CACHE_MAX_ENTRIES', 2000))
+app.config['SIMILAR_CACHE_SEED_LIMIT'] = int(os.getenv('SIMILAR_CACHE_SEED_LIMIT', 500))
 app.config['SESSION_COOKIE_SECURE'] = True
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 
 init_db(app)
 app.register_blueprint(bp)
-CORS(app, origins=["https://inforens-chatbot.vercel.app"], supports_credentials=True)
+CORS(app, origins=CORS_ORIGINS, supports_credentials=True)
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,219 @@
+"""Async (ASGI) serving mode.
+
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker -w 2
+
+The endpoints that spend most of their time waiting on Perplexity are served
+natively on the event loop with AsyncLLMClient, so an in-flight upstream call
+costs a coroutine instead of a worker thread. Anything CPU- or DB-bound
+(DOCX rendering, Query writes, cache lookups that may touch the DB) runs on a
+bounded thread pool inside a Flask app context. Every other route falls
+through to the regular Flask app via WsgiToAsgi, so behaviour is unchanged.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from asgiref.wsgi import WsgiToAsgi
+from app import app as flask_app, CORS_ORIGINS
+from llm_client import AsyncLLMClient
+from chatbot.chatbot import PerplexityChatbot
+from scholarship_finder.scholarship import build_prompt as scholarship_prompt, build_payload as scholarship_payload, parse_scholarships
+from sop_builder.sop_builder import build_sop_prompt, build_sop_payload, sop_from_response
+from cv_builder.generate_cv import build_payload as cv_payload, PERPLEXITY_API_KEY as CV_API_KEY
+from cv_builder.prompt_builder import build_prompt_CV as cv_prompt, build_prompt_cover_letter as cover_letter_prompt
+from cv_builder.save import save_as_docx
+from routes import (get_bot, lookup_cached_answer, remember_answer, log_query, missing_fields,
+                    _extract_user_data, SCHOLARSHIP_REQUIRED_FIELDS, SOP_REQUIRED_FIELDS)
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncGateway:
+    def __init__(self, flask_app, max_workers=16):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-offload")
+        self.client = None
+        self.routes = {
+            ("POST", "/api/ask"): self.ask,
+            ("POST", "/api/scholarships"): self.scholarships,
+            ("POST", "/api/sop"): self.sop,
+            ("POST", "/api/cv/download/docx"): self.cv_download_docx,
+            ("POST", "/api/cv/generate/coverLetter"): self.generate_cover_letter,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        handler = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if handler is None:
+            return await self.wsgi(scope, receive, send)
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        try:
+            body = await self._read_body(receive)
+            status, content_type, payload, extra = await handler(scope, headers, body)
+        except HTTPError as e:
+            status, content_type, payload, extra = e.status, "application/json", {"error": str(e)}, {}
+        except Exception as e:
+            self.flask_app.logger.error(f"Error in {scope['path']}: {e}")
+            status, content_type, payload, extra = 500, "application/json", {"error": str(e)}, {}
+        await self._respond(send, headers, status, content_type, payload, extra)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.close()
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _client(self):
+        # Created lazily so it binds to the running event loop.
+        if self.client is None:
+            self.client = AsyncLLMClient(
+                pool_size=int(os.getenv("PERPLEXITY_ASYNC_POOL_SIZE", 200)),
+                max_retries=int(os.getenv("PERPLEXITY_MAX_RETRIES", 3)),
+            )
+        return self.client
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _respond(self, send, request_headers, status, content_type, payload, extra):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        headers = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        # Mirror flask-cors for the routes that bypass Flask.
+        origin = request_headers.get("origin")
+        if origin in CORS_ORIGINS:
+            headers += [(b"access-control-allow-origin", origin.encode()),
+                        (b"access-control-allow-credentials", b"true"),
+                        (b"vary", b"Origin")]
+        headers += [(k.encode(), v.encode()) for k, v in extra.items()]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """Run fn on the bounded offload pool inside a Flask app context."""
+        def call():
+            with self.flask_app.app_context():
+                return fn(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def _json(self, body, required=False):
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        if required and not data:
+            raise HTTPError(400, "JSON body required")
+        return data or {}
+
+    async def ask(self, scope, headers, body):
+        start = time.time()
+        data = self._json(body)
+        question = (data.get("question") or "").strip()
+        context_mode = data.get("contextMode")
+        if not question:
+            raise HTTPError(400, "Question is required")
+        if context_mode and context_mode not in PerplexityChatbot.CONTEXT_MODES:
+            raise HTTPError(400, "contextMode must be 'retrieval' or 'full'")
+
+        chatbot = await self.run_sync(get_bot)
+        mode = context_mode or chatbot.context_mode
+
+        try:
+            raw_answer, model = await self.run_sync(lookup_cached_answer, chatbot, question, mode)
+            if raw_answer is None:
+                payload = chatbot.build_payload(question, mode)
+                raw_answer = chatbot.parse_answer(await self._client().chat_content(payload, chatbot.api_key))
+                model = "perplexity-sonar"
+                await self.run_sync(remember_answer, chatbot, question, mode, raw_answer)
+            latency_ms = int((time.time() - start) * 1000)
+
+            client_addr = scope.get("client") or (None, None)
+            message_id = await self.run_sync(
+                log_query,
+                session_id=data.get("sessionId"),
+                user_id=data.get("userId"),
+                question=question,
+                answer=raw_answer["answer"],
+                model=model,
+                latency_ms=latency_ms,
+                success=True,
+                ip_address=headers.get("x-forwarded-for", client_addr[0]),
+                user_agent=headers.get("user-agent"),
+            )
+        except Exception as e:
+            self.flask_app.logger.error(f"Error during ask: {e}")
+            raise HTTPError(500, f"Failed to get answer: {str(e)}")
+
+        return 200, "application/json", {
+            "answer": raw_answer["answer"],
+            "links": raw_answer["links"],
+            "latencyMs": latency_ms,
+            "messageId": message_id
+        }, {}
+
+    async def scholarships(self, scope, headers, body):
+        data = self._json(body)
+        missing = missing_fields(data, SCHOLARSHIP_REQUIRED_FIELDS)
+        if missing:
+            raise HTTPError(400, f"Missing required fields: {', '.join(missing)}")
+
+        prompt = scholarship_prompt(data)
+        results = await self._client().chat_content(scholarship_payload(prompt), self.flask_app.config.get("PERPLEXITY_API_KEY"))
+        return 200, "application/json", {"scholarships": parse_scholarships(results), "prompt": prompt}, {}
+
+    async def sop(self, scope, headers, body):
+        data = self._json(body)
+        missing = missing_fields(data, SOP_REQUIRED_FIELDS)
+        if missing:
+            raise HTTPError(400, f"Missing required fields: {', '.join(missing)}")
+
+        prompt = build_sop_prompt(data)
+        response = await self._client().chat_completion(build_sop_payload(prompt), self.flask_app.config.get("PERPLEXITY_API_KEY"))
+        sop = sop_from_response(response)
+        if not sop:
+            raise HTTPError(500, "Failed to generate SOP")
+        return 200, "application/json", {"sop": sop, "prompt": prompt, "word_count": len(sop.split())}, {}
+
+    async def _docx_download(self, prompt, download_name):
+        generated = await self._client().chat_content(cv_payload(prompt), CV_API_KEY)
+        buffer = BytesIO()
+        await self.run_sync(save_as_docx, generated, buffer)
+        return 200, DOCX_MIMETYPE, buffer.getvalue(), {
+            "content-disposition": f'attachment; filename="{download_name}"'
+        }
+
+    async def cv_download_docx(self, scope, headers, body):
+        data = self._json(body, required=True)
+        workflow = data.get("workflow")
+        if not workflow:
+            raise HTTPError(400, "workflow field is required")
+        return await self._docx_download(cv_prompt(_extract_user_data(data, workflow)), "Generated_CV.docx")
+
+    async def generate_cover_letter(self, scope, headers, body):
+        data = self._json(body, required=True)
+        user_data = _extract_user_data(data, "existing")
+        return await self._docx_download(cover_letter_prompt(user_data), "Generated_Cover_Letter.docx")
+
+
+application = AsyncGateway(flask_app, max_workers=int(os.getenv("ASGI_OFFLOAD_WORKERS", 16)))
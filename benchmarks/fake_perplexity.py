@@ -0,0 +1,74 @@
+"""Local stand-in for the Perplexity chat completions API, for load testing.
+
+    python benchmarks/fake_perplexity.py --port 8099 --delay 2.0
+
+Point the app at it with PERPLEXITY_API_BASE=http://127.0.0.1:8099. Every
+request sleeps --delay seconds (the upstream generation time we are simulating)
+and then returns a canned completion that parses for /api/ask, /api/sop,
+/api/scholarships and the CV endpoints alike.
+"""
+import argparse
+import asyncio
+import json
+
+ANSWER = json.dumps({
+    "answer": "Inforens helps international students with visas, housing, banking and more.",
+    "links": ["https://www.inforens.com/contact-us"],
+    "scholarships": [{"name": "Example Scholarship", "description": "A canned scholarship.", "deadline": "Dec 12, 2025"}],
+})
+CV = json.dumps({
+    "full_name": "Test Student",
+    "email": "test.student@example.com",
+    "links": [{"name": "LinkedIn", "url": "https://www.linkedin.com/in/test-student"}],
+    "education": [{"university_name": "Example University", "course": "MSc Data Science",
+                   "start_date": "09/01/2024", "end_date": "09/01/2025"}],
+    "skills": ["Python", "SQL"],
+})
+
+
+def completion(content):
+    return json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode("utf-8")
+
+
+async def handle(reader, writer, delay):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value.strip())
+            request_body = await reader.readexactly(length) if length else b""
+
+            await asyncio.sleep(delay)
+            body = completion(CV if b"CV" in request_body else ANSWER)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=2.0, help="simulated generation time in seconds")
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(lambda r, w: handle(r, w, args.delay), args.host, args.port, backlog=2048)
+    print(f"Fake Perplexity on http://{args.host}:{args.port} (delay {args.delay}s)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Concurrent load against /api/ask (or any JSON endpoint) to compare serving modes.
+
+    # 1. fake upstream with a 2 s generation time
+    python benchmarks/fake_perplexity.py --delay 2
+    # 2a. sync workers (today's deployment)
+    PERPLEXITY_API_BASE=http://127.0.0.1:8099 ANSWER_CACHE_BACKEND=none SIMILAR_CACHE_ENABLED=false \\
+        gunicorn app:app -w 4 -b 127.0.0.1:8000
+    # 2b. async mode
+    PERPLEXITY_API_BASE=http://127.0.0.1:8099 ANSWER_CACHE_BACKEND=none SIMILAR_CACHE_ENABLED=false \\
+        gunicorn asgi:application -k uvicorn.workers.UvicornWorker -w 1 -b 127.0.0.1:8000
+    # 3. same load against each
+    python benchmarks/load_test.py --url http://127.0.0.1:8000/api/ask -c 200 -n 1000
+
+With sync workers throughput is capped at workers / delay; the async process
+should stay close to concurrency / delay until the DB or CPU becomes the limit.
+"""
+import argparse
+import asyncio
+import json
+import time
+import aiohttp
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def worker(session, url, body, queue, latencies, errors):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            async with session.post(url, json=body) as response:
+                await response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    continue
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/ask")
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("-n", "--requests", type=int, default=500)
+    parser.add_argument("--body", default=json.dumps({"question": "How do I get a UK student visa?"}))
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+    latencies, errors = [], []
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session, args.url, json.loads(args.body), queue, latencies, errors)
+                               for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {elapsed:.2f}s")
+    print(f"  throughput  {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency ms  p50 {percentile(latencies, 50):.0f}  p95 {percentile(latencies, 95):.0f}  "
+          f"p99 {percentile(latencies, 99):.0f}")
+    print(f"  errors      {len(errors)} {sorted(set(map(str, errors)))[:5]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
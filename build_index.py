@@ -0,0 +1,42 @@
+import argparse
+import hashlib
+import os
+import time
+from dotenv import load_dotenv
+from chatbot.index_file import StaleIndexError, default_index_path, load_index, write_index
+
+load_dotenv()
+
+parser = argparse.ArgumentParser(description="Compile the scraped content file into a memory-mapped retrieval index.")
+parser.add_argument("content_file", nargs="?", default=os.getenv("CONTENT_FILE") or "inforens_scraped_data.txt")
+parser.add_argument("--output", default=os.getenv("CONTENT_INDEX_FILE"), help="defaults to <content_file>.idx")
+parser.add_argument("--chunk-chars", type=int, default=int(os.getenv("RETRIEVAL_CHUNK_CHARS", 1200)))
+parser.add_argument("--check", action="store_true", help="only report whether the existing index is up to date")
+args = parser.parse_args()
+
+index_path = args.output or default_index_path(args.content_file)
+with open(args.content_file, "rb") as f:
+    raw = f.read()
+text = raw.decode("utf-8")
+content_hash = hashlib.sha256(raw).hexdigest()
+
+if args.check:
+    try:
+        load_index(index_path, content_hash, text, args.chunk_chars)
+        print(f"{index_path} is up to date ({content_hash[:12]}).")
+    except (FileNotFoundError, StaleIndexError, ValueError) as e:
+        print(f"{index_path} needs rebuilding: {e}")
+        raise SystemExit(1)
+else:
+    start = time.perf_counter()
+    table, index = write_index(index_path, content_hash, text, args.chunk_chars)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    load_index(index_path, content_hash, text, args.chunk_chars)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Indexed {args.content_file} ({len(raw)} bytes, sha256 {content_hash[:12]}) into {index_path}")
+    print(f"  {len(table)} chunks, {len(index.vocab)} terms, {len(index.postings_docs)} postings, "
+          f"{os.path.getsize(index_path)} bytes")
+    print(f"  build {build_ms:.1f} ms, mmap load {load_ms:.2f} ms")
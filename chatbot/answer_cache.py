@@ -0,0 +1,144 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from chatbot.retrieval import STOP_WORDS
+
+# Negations change the meaning of a question, so they are never dropped from the key.
+KEY_STOP_WORDS = STOP_WORDS - {"no", "nor", "not"}
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(question):
+    """Case, whitespace, punctuation and stop-word insensitive form of a question."""
+    return " ".join(w for w in WORD.findall(question.lower()) if w not in KEY_STOP_WORDS)
+
+
+def cache_key(question, content_hash, context_mode=""):
+    normalized = normalize_question(question)
+    return hashlib.sha256(f"{content_hash}|{context_mode}|{normalized}".encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL. Shared by all threads of a worker."""
+
+    def __init__(self, max_entries=1024, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisBackend:
+    """Any Redis-protocol server (Redis, Valkey, KeyDB, a local stand-in).
+
+    TTL is set per key; LRU eviction is left to the server's maxmemory-policy, which
+    should be allkeys-lru for a dedicated cache instance.
+    """
+
+    def __init__(self, url, ttl=86400, prefix="inforens:answer:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ANSWER_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+
+class AnswerCache:
+    """Cache of /api/ask answers keyed on the normalized question and the content version."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, question, content_hash, context_mode=""):
+        try:
+            raw = self.backend.get(cache_key(question, content_hash, context_mode))
+        except Exception:
+            # A cache outage must never fail the request; it only costs an upstream call.
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, question, content_hash, answer, context_mode=""):
+        try:
+            self.backend.set(cache_key(question, content_hash, context_mode), json.dumps(answer))
+        except Exception:
+            self.errors += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        try:
+            size = len(self.backend)
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_answer_cache(config):
+    """Build the cache from app config; returns None when ANSWER_CACHE_BACKEND is 'none'."""
+    backend = (config.get("ANSWER_CACHE_BACKEND") or "memory").lower()
+    ttl = int(config.get("ANSWER_CACHE_TTL", 86400))
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return AnswerCache(MemoryBackend(int(config.get("ANSWER_CACHE_MAX_ENTRIES", 1024)), ttl))
+    if backend == "redis":
+        return AnswerCache(RedisBackend(config.get("ANSWER_CACHE_URL") or "redis://localhost:6379/0", ttl))
+    raise ValueError(f"Unknown ANSWER_CACHE_BACKEND: {backend}")
@@ -1,27 +1,33 @@
-import requests
 import re
 import json
 from chatbot.helper import clean_json
 from cv_builder.parse_cv import extract_json_object
+from chatbot.knowledge_base import get_knowledge_base
+from llm_client import get_client
 
 class PerplexityChatbot:
-    def __init__(self, api_key, content_file_path="inforens_scraped_data.txt"):
+    CONTEXT_MODES = ("retrieval", "full")
+
+    def __init__(self, api_key, content_file_path="inforens_scraped_data.txt", knowledge_base=None,
+                 context_mode="retrieval", top_k=8, token_budget=3000):
+        if context_mode not in self.CONTEXT_MODES:
+            raise ValueError(f"Invalid context mode: {context_mode}")
         self.api_key = api_key
         self.content_file_path = content_file_path
-        self.full_text = self._load_content()
-        self.valid_urls = self._extract_valid_urls()
+        self.context_mode = context_mode
+        self.top_k = top_k
+        self.token_budget = token_budget
+        # The knowledge base is shared by every chatbot in the process, so building
+        # a PerplexityChatbot no longer re-reads or re-scans the content file.
+        self.knowledge_base = knowledge_base or get_knowledge_base(content_file_path)
 
-    def _load_content(self):
-        try:
-            with open(self.content_file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            print("⚠️ Content file not found.")
-            return ""
+    @property
+    def full_text(self):
+        return self.knowledge_base.full_text
 
-    def _extract_valid_urls(self):
-        urls = set(re.findall(r"https?://[^\s,)]+", self.full_text))
-        return urls
+    @property
+    def valid_urls(self):
+        return self.knowledge_base.valid_urls
 
     def _postprocess_answer(self, answer):
         # Remove numbered citation marks ([1][2] etc).
@@ -29,9 +35,19 @@ class PerplexityChatbot:
         answer = re.sub(r"\[https?://([^\]]+)\]\(https?://[^\)]+\)", r"https://\1", answer)
         return answer
 
-    def ask_question(self, user_question):
-        if not self.full_text:
-            return "No content loaded. Please check the .txt file."
+    def _build_context(self, user_question, context_mode):
+        # "full" ships the whole scrape (the original behaviour, kept for A/B runs);
+        # "retrieval" ships only the best-matching chunks with their source URLs.
+        if context_mode == "full":
+            return self.full_text
+        context, _urls = self.knowledge_base.select_context(user_question, self.top_k, self.token_budget)
+        return context
+
+    def build_payload(self, user_question, context_mode=None):
+        context_mode = context_mode or self.context_mode
+        if context_mode not in self.CONTEXT_MODES:
+            raise ValueError(f"Invalid context mode: {context_mode}")
+        context = self._build_context(user_question, context_mode)
 
         prompt = f"""{{
             "role": "system",
@@ -48,7 +64,7 @@ class PerplexityChatbot:
             10. Return the answer in a JSON format with the following keys: answer and links (ensure no links are included in the answer).\\n\
                 a. "answer": "The answer to the question - NO LINKS INCLUDED"
                 b. "links": ["https://www.inforens.com/contact-us", "https://www.inforens.com/guides"]
-            Inforens Content:\\n{self.full_text}\\n\\n\
+            Inforens Content:\\n{context}\\n\\n\
             Question: {user_question}\\n\
             Answer:"
         }}"""
@@ -58,23 +74,21 @@ class PerplexityChatbot:
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 400
         }
+        return payload
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+    def parse_answer(self, raw_answer):
+        processed_answer = self._postprocess_answer(raw_answer)
+        processed_answer = extract_json_object(processed_answer)
+        processed_answer = clean_json(processed_answer)
+        return json.loads(processed_answer)
+
+    def ask_question(self, user_question, context_mode=None):
+        if not self.full_text:
+            return "No content loaded. Please check the .txt file."
 
+        payload = self.build_payload(user_question, context_mode)
         try:
-            response = requests.post(
-                "https://api.perplexity.ai/chat/completions",
-                json=payload,
-                headers=headers
-            )
-            response.raise_for_status()
-            raw_answer = response.json()['choices'][0]['message']['content']
-            processed_answer = self._postprocess_answer(raw_answer)
-            processed_answer = extract_json_object(processed_answer)
-            processed_answer = clean_json(processed_answer)
-            return json.loads(processed_answer)
+            raw_answer = get_client().chat_content(payload, self.api_key)
+            return self.parse_answer(raw_answer)
         except Exception as e:
             return f"API request failed: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,172 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from chatbot.retrieval import Bm25Index, ChunkTable, chunk_content
+
+# On-disk layout of a prebuilt retrieval index:
+#
+#   header   MAGIC, format version, byte order, sha256 of the content file, chunk size,
+#            BM25 parameters and section count
+#   table    (offset, length) for each section below
+#   sections 8-byte aligned raw arrays, in SECTIONS order
+#
+# Every section is a flat array that is exposed through memoryview.cast() straight
+# out of the mmap, so workers share the same physical pages and loading does no
+# parsing beyond the header.
+MAGIC = b"IFRIDX01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIB32sIddI")
+SECTION = struct.Struct("<QQ")
+
+SECTIONS = (
+    ("chunk_starts", "I"),
+    ("chunk_ends", "I"),
+    ("chunk_url_ids", "I"),
+    ("url_offsets", "I"),
+    ("url_blob", "B"),
+    ("term_offsets", "I"),
+    ("term_blob", "B"),
+    ("postings_offsets", "I"),
+    ("postings_docs", "I"),
+    ("postings_tfs", "I"),
+    ("idf", "d"),
+    ("doc_len", "I"),
+)
+
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+class StaleIndexError(Exception):
+    pass
+
+
+class PackedVocabulary:
+    """Sorted UTF-8 terms in one blob; lookup is a binary search, no dict is ever built."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def lookup(self, term):
+        key = term.encode("utf-8")
+        blob, offsets = self.blob, self.offsets
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = blob[offsets[mid]:offsets[mid + 1]].tobytes()
+            if current == key:
+                return mid
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+def _pack_strings(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, array("B", blob)
+
+
+def default_index_path(content_file_path):
+    return content_file_path + ".idx"
+
+
+def write_index(index_path, content_hash, text, chunk_chars=1200, k1=1.5, b=0.75):
+    """Chunk and index `text`, then write the binary index atomically to index_path."""
+    table = ChunkTable.from_chunks(text, chunk_content(text, chunk_chars))
+    index = Bm25Index.build(table, k1=k1, b=b)
+    url_offsets, url_blob = _pack_strings(table.urls)
+    term_offsets, term_blob = _pack_strings(index.vocab.terms)
+
+    arrays = {
+        "chunk_starts": table.starts,
+        "chunk_ends": table.ends,
+        "chunk_url_ids": table.url_ids,
+        "url_offsets": url_offsets,
+        "url_blob": url_blob,
+        "term_offsets": term_offsets,
+        "term_blob": term_blob,
+        "postings_offsets": index.postings_offsets,
+        "postings_docs": index.postings_docs,
+        "postings_tfs": index.postings_tfs,
+        "idf": index.idf,
+        "doc_len": index.doc_len,
+    }
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, bytes.fromhex(content_hash),
+                         chunk_chars, k1, b, len(SECTIONS))
+    pos = len(header) + SECTION.size * len(SECTIONS)
+    table_entries = []
+    payloads = []
+    for name, _typecode in SECTIONS:
+        data = arrays[name].tobytes()
+        pos += -pos % 8
+        table_entries.append(SECTION.pack(pos, len(data)))
+        payloads.append((pos, data))
+        pos += len(data)
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(table_entries))
+        for offset, data in payloads:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    # Workers may be reading the old file; replace is atomic and their mmaps stay valid.
+    os.replace(tmp_path, index_path)
+    return table, index
+
+
+def load_index(index_path, content_hash, text, chunk_chars=1200):
+    """Map a prebuilt index. Raises StaleIndexError if it does not match the content."""
+    with open(index_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < HEADER.size:
+        raise StaleIndexError("Index file is truncated")
+    magic, version, byte_order, digest, file_chunk_chars, k1, b, n_sections = HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or n_sections != len(SECTIONS):
+        raise StaleIndexError("Index file format is not supported")
+    if byte_order != BYTE_ORDER:
+        raise StaleIndexError("Index file was built on a machine with a different byte order")
+    if digest.hex() != content_hash:
+        raise StaleIndexError("Index file was built from different content")
+    if file_chunk_chars != chunk_chars:
+        raise StaleIndexError("Index file was built with a different chunk size")
+
+    view = memoryview(mm)
+    sections = {}
+    for i, (name, typecode) in enumerate(SECTIONS):
+        offset, length = SECTION.unpack_from(mm, HEADER.size + i * SECTION.size)
+        if offset + length > len(mm):
+            raise StaleIndexError("Index file is truncated")
+        sections[name] = view[offset:offset + length].cast(typecode)
+
+    url_offsets, url_blob = sections["url_offsets"], sections["url_blob"]
+    urls = [url_blob[url_offsets[i]:url_offsets[i + 1]].tobytes().decode("utf-8")
+            for i in range(len(url_offsets) - 1)]
+
+    table = ChunkTable(text, sections["chunk_starts"], sections["chunk_ends"], sections["chunk_url_ids"], urls)
+    index = Bm25Index(
+        PackedVocabulary(sections["term_blob"], sections["term_offsets"]),
+        sections["postings_offsets"],
+        sections["postings_docs"],
+        sections["postings_tfs"],
+        sections["idf"],
+        sections["doc_len"],
+        k1=k1,
+        b=b,
+    )
+    index.mapping = mm
+    return table, index
+
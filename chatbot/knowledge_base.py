@@ -0,0 +1,168 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from chatbot.index_file import StaleIndexError, default_index_path, load_index, write_index
+from chatbot.retrieval import Bm25Index, ChunkTable, chunk_content, select_context
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class KnowledgeBase:
+    """Scraped Inforens content, loaded once per process and shared across threads.
+
+    The file is re-read only when its mtime changes *and* the content hash differs,
+    so touching the file without editing it does not trigger a rebuild.
+    """
+
+    def __init__(self, content_file_path, check_interval=5.0, chunk_chars=1200, index_path=None):
+        self.content_file_path = content_file_path
+        self.check_interval = check_interval
+        self.chunk_chars = chunk_chars
+        self.index_path = index_path or default_index_path(content_file_path)
+        self.index_source = None
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = 0.0
+
+        self.full_text = ""
+        self.valid_urls = set()
+        self.content_hash = None
+        self._retrieval = ([], None)
+        self.size_bytes = 0
+        self.loaded_at = None
+        self.load_time_ms = None
+        self.reload_count = 0
+
+        with self._lock:
+            self._load()
+
+    def _read(self):
+        try:
+            with open(self.content_file_path, "rb") as f:
+                mtime = os.fstat(f.fileno()).st_mtime
+                return f.read(), mtime
+        except FileNotFoundError:
+            print("⚠️ Content file not found.")
+            return b"", None
+
+    def _load(self, raw=None, mtime=None):
+        start = time.perf_counter()
+        if raw is None:
+            raw, mtime = self._read()
+
+        text = raw.decode("utf-8")
+        # Build everything before publishing so a reload never exposes a half-built index.
+        valid_urls = set(re.findall(r"https?://[^\s,)]+", text))
+        content_hash = hashlib.sha256(raw).hexdigest()
+        chunks, index, index_source = self._load_index(text, content_hash)
+
+        self.full_text = text
+        self.valid_urls = valid_urls
+        self.content_hash = content_hash
+        self._retrieval = (chunks, index)
+        self.index_source = index_source
+        self.size_bytes = len(raw)
+        self._mtime = mtime
+        self.loaded_at = time.time()
+        self.load_time_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    def _load_index(self, text, content_hash):
+        # Prefer the prebuilt index (see build_index.py): it is mmapped, so every worker
+        # shares the same pages and boot does no tokenizing. A missing or stale file is
+        # rebuilt once; if that is impossible (read-only disk) we index in memory.
+        try:
+            table, index = load_index(self.index_path, content_hash, text, self.chunk_chars)
+            return table, index, "mmap"
+        except FileNotFoundError:
+            pass
+        except (StaleIndexError, ValueError, OSError) as e:
+            print(f"⚠️ Retrieval index is stale, rebuilding: {e}")
+
+        try:
+            write_index(self.index_path, content_hash, text, self.chunk_chars)
+            table, index = load_index(self.index_path, content_hash, text, self.chunk_chars)
+            return table, index, "rebuilt"
+        except (StaleIndexError, ValueError, OSError) as e:
+            print(f"⚠️ Could not write retrieval index, indexing in memory: {e}")
+
+        table = ChunkTable.from_chunks(text, chunk_content(text, self.chunk_chars))
+        return table, Bm25Index.build(table), "memory"
+
+    @property
+    def content_mtime(self):
+        return self._mtime
+
+    @property
+    def chunks(self):
+        return self._retrieval[0]
+
+    @property
+    def index(self):
+        return self._retrieval[1]
+
+    def select_context(self, question, top_k=8, token_budget=3000):
+        """Top-k chunks for a question as (context_text, source_urls)."""
+        chunks, index = self._retrieval
+        if index is None:
+            return "", []
+        return select_context(index, chunks, question, top_k, token_budget)
+
+    def refresh(self):
+        """Reload the content if the file changed on disk. Cheap enough to call per request."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+
+            try:
+                mtime = os.stat(self.content_file_path).st_mtime
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self._mtime:
+                return False
+
+            raw, mtime = self._read()
+            if hashlib.sha256(raw).hexdigest() == self.content_hash:
+                self._mtime = mtime
+                return False
+
+            self._load(raw, mtime)
+            self.reload_count += 1
+            return True
+
+    def stats(self):
+        return {
+            "contentFile": self.content_file_path,
+            "contentHash": self.content_hash,
+            "sizeBytes": self.size_bytes,
+            "chars": len(self.full_text),
+            "urlCount": len(self.valid_urls),
+            "chunkCount": len(self.chunks),
+            "vocabularySize": len(self.index.vocab) if self.index else 0,
+            "indexFile": self.index_path,
+            "indexSource": self.index_source,
+            "loadedAt": self.loaded_at,
+            "loadTimeMs": self.load_time_ms,
+            "reloadCount": self.reload_count,
+        }
+
+
+def get_knowledge_base(content_file_path, check_interval=5.0, chunk_chars=1200, index_path=None):
+    """Return the process-wide KnowledgeBase for a content file, creating it on first use."""
+    key = os.path.abspath(content_file_path)
+    kb = _registry.get(key)
+    if kb is None:
+        with _registry_lock:
+            kb = _registry.get(key)
+            if kb is None:
+                kb = KnowledgeBase(content_file_path, check_interval=check_interval,
+                                   chunk_chars=chunk_chars, index_path=index_path)
+                _registry[key] = kb
+    return kb
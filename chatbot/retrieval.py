@@ -0,0 +1,199 @@
+import math
+import re
+from array import array
+from collections import Counter, namedtuple
+
+# A chunk is a slice of the content file: [start, end) character offsets plus the
+# page URL from the nearest preceding "--https://...--" marker.
+Chunk = namedtuple("Chunk", ["url", "start", "end", "text"])
+NO_URL = 0xFFFFFFFF
+
+PAGE_MARKER = re.compile(r"--(https?://\S+?)--")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n")
+TOKEN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into
+is it its itself just me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own same she should so some such than that the their
+theirs them themselves then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your
+yours yourself yourselves
+""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose; good enough for budgeting.
+    return len(text) // 4 + 1
+
+
+def _split_long(text, start, end, max_chars):
+    """Split text[start:end] into windows of at most max_chars, preferring sentence ends."""
+    while end - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = max(window.rfind(". "), window.rfind("? "), window.rfind("! "))
+        if cut < max_chars // 2:
+            cut = window.rfind(" ")
+        if cut <= 0:
+            cut = max_chars - 1
+        yield start, start + cut + 1
+        start += cut + 1
+        while start < end and text[start].isspace():
+            start += 1
+    if end > start:
+        yield start, end
+
+
+def chunk_content(text, max_chars=1200):
+    """Split the scraped content along page markers, then paragraphs, then sentences."""
+    chunks = []
+    markers = list(PAGE_MARKER.finditer(text))
+    pages = []
+    if not markers or markers[0].start() > 0:
+        pages.append((None, 0, markers[0].start() if markers else len(text)))
+    for i, m in enumerate(markers):
+        page_end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        pages.append((m.group(1), m.end(), page_end))
+
+    for url, page_start, page_end in pages:
+        pos = page_start
+        breaks = [(b.start(), b.end()) for b in PARAGRAPH_BREAK.finditer(text, page_start, page_end)]
+        breaks.append((page_end, page_end))
+        for para_end, next_start in breaks:
+            # Trim surrounding whitespace without losing the offsets.
+            s, e = pos, para_end
+            while s < e and text[s].isspace():
+                s += 1
+            while e > s and text[e - 1].isspace():
+                e -= 1
+            for cs, ce in _split_long(text, s, e, max_chars):
+                chunks.append(Chunk(url, cs, ce, text[cs:ce]))
+            pos = next_start
+    return chunks
+
+
+class ChunkTable:
+    """Chunk boundaries stored as parallel integer arrays; chunk text is sliced on demand."""
+
+    def __init__(self, text, starts, ends, url_ids, urls):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.url_ids = url_ids
+        self.urls = urls
+
+    @classmethod
+    def from_chunks(cls, text, chunks):
+        urls = []
+        url_ids = {}
+        for chunk in chunks:
+            if chunk.url is not None and chunk.url not in url_ids:
+                url_ids[chunk.url] = len(urls)
+                urls.append(chunk.url)
+        return cls(
+            text,
+            array("I", (c.start for c in chunks)),
+            array("I", (c.end for c in chunks)),
+            array("I", (NO_URL if c.url is None else url_ids[c.url] for c in chunks)),
+            urls,
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        start, end, url_id = self.starts[i], self.ends[i], self.url_ids[i]
+        return Chunk(None if url_id == NO_URL else self.urls[url_id], start, end, self.text[start:end])
+
+
+class DictVocabulary:
+    def __init__(self, terms):
+        self.terms = terms
+        self._ids = {term: i for i, term in enumerate(terms)}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def lookup(self, term):
+        return self._ids.get(term)
+
+
+class Bm25Index:
+    """Okapi BM25 over content chunks, stored as CSR arrays (term -> postings slice).
+
+    The same layout is used whether the index was built in memory or mapped from a
+    prebuilt index file (see chatbot.index_file), so search() never cares which.
+    """
+
+    def __init__(self, vocab, postings_offsets, postings_docs, postings_tfs, idf, doc_len, k1=1.5, b=0.75):
+        self.vocab = vocab
+        self.postings_offsets = postings_offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.idf = idf
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        n = len(doc_len)
+        self.avg_len = (sum(doc_len) / n) if n else 0.0
+
+    @classmethod
+    def build(cls, chunks, k1=1.5, b=0.75):
+        postings = {}
+        doc_len = array("I")
+        for doc_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk.text))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        n = len(doc_len)
+        terms = sorted(postings)
+        offsets, docs, tfs, idf = array("I", [0]), array("I"), array("I"), array("d")
+        for term in terms:
+            plist = postings[term]
+            for doc_id, tf in plist:
+                docs.append(doc_id)
+                tfs.append(tf)
+            offsets.append(len(docs))
+            idf.append(math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5)))
+        return cls(DictVocabulary(terms), offsets, docs, tfs, idf, doc_len, k1, b)
+
+    def search(self, query, k=8):
+        scores = {}
+        k1, b, avg_len = self.k1, self.b, self.avg_len or 1.0
+        offsets, docs, tfs, doc_len = self.postings_offsets, self.postings_docs, self.postings_tfs, self.doc_len
+        for term in set(tokenize(query)):
+            term_id = self.vocab.lookup(term)
+            if term_id is None:
+                continue
+            idf = self.idf[term_id]
+            for p in range(offsets[term_id], offsets[term_id + 1]):
+                doc_id, tf = docs[p], tfs[p]
+                norm = k1 * (1 - b + b * doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def select_context(index, chunks, question, top_k=8, token_budget=3000):
+    """Return (context_text, source_urls) for the best chunks that fit in the token budget."""
+    blocks = []
+    urls = []
+    used = 0
+    for doc_id, _score in index.search(question, top_k):
+        chunk = chunks[doc_id]
+        block = f"Source: {chunk.url}\n{chunk.text}" if chunk.url else chunk.text
+        cost = estimate_tokens(block)
+        if blocks and used + cost > token_budget:
+            break
+        blocks.append(block)
+        used += cost
+        if chunk.url and chunk.url not in urls:
+            urls.append(chunk.url)
+    return "\n\n".join(blocks), urls
@@ -0,0 +1,120 @@
+import math
+import threading
+import zlib
+from collections import OrderedDict
+from chatbot.answer_cache import normalize_question
+
+DIMENSIONS = 1 << 18
+NGRAM_SIZES = (3, 4, 5)
+
+
+def embed(question):
+    """Hashed character n-gram vector of the normalized question, L2-normalized.
+
+    Sparse {bucket: weight}; crc32 keeps buckets stable across processes, unlike hash().
+    """
+    text = f" {normalize_question(question)} "
+    counts = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            bucket = zlib.crc32(text[i:i + n].encode("utf-8")) % DIMENSIONS
+            counts[bucket] = counts.get(bucket, 0) + 1
+    norm = math.sqrt(sum(v * v for v in counts.values()))
+    if not norm:
+        return {}
+    return {bucket: v / norm for bucket, v in counts.items()}
+
+
+class SimilarQuestionCache:
+    """Second cache tier for /api/ask: serves an answer to a paraphrased question.
+
+    Entries live in an LRU and an inverted index (bucket -> entry ids), so a lookup
+    only scores entries that share at least one n-gram with the question. All entries
+    belong to one content version; a new content hash empties the tier.
+    """
+
+    def __init__(self, threshold=0.9, max_entries=2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.content_hash = None
+        self.hits = 0
+        self.misses = 0
+        self.seeded = 0
+        self._entries = OrderedDict()
+        self._postings = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, content_hash):
+        if content_hash != self.content_hash:
+            self._entries.clear()
+            self._postings.clear()
+            self.content_hash = content_hash
+
+    def _remove(self, entry_id):
+        vector = self._entries.pop(entry_id)[0]
+        for bucket in vector:
+            ids = self._postings.get(bucket)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._postings[bucket]
+
+    def add(self, question, answer, content_hash, trusted=False):
+        vector = embed(question)
+        if not vector:
+            return
+        with self._lock:
+            self._check_version(content_hash)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (vector, answer, trusted)
+            for bucket in vector:
+                self._postings.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def lookup(self, question, content_hash):
+        """Return (answer, similarity) for the best match above the threshold, else None."""
+        vector = embed(question)
+        with self._lock:
+            self._check_version(content_hash)
+            scores = {}
+            for bucket, weight in vector.items():
+                for entry_id in self._postings.get(bucket, ()):
+                    scores[entry_id] = scores.get(entry_id, 0.0) + weight * self._entries[entry_id][0][bucket]
+
+            best = None
+            for entry_id, score in scores.items():
+                if score < self.threshold:
+                    continue
+                trusted = self._entries[entry_id][2]
+                # Thumbs-up answers beat closer but unrated ones.
+                rank = (trusted, score)
+                if best is None or rank > best[0]:
+                    best = (rank, entry_id)
+
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry_id = best[1]
+            self._entries.move_to_end(entry_id)
+            return self._entries[entry_id][1], best[0][1]
+
+    def seed(self, rows, content_hash):
+        """Load (question, answer) pairs that users rated thumbs-up."""
+        for question, answer in rows:
+            self.add(question, answer, content_hash, trusted=True)
+            self.seeded += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "seeded": self.seeded,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,144 @@
+import json
+import re
+
+CITATION = re.compile(r'\[\d+\]')
+MARKDOWN_LINK = re.compile(r"\[https?://([^\]]+)\]\(https?://[^\)]+\)")
+PARTIAL_CITATION = re.compile(r'\[\d*')
+PARTIAL_MARKDOWN_LINK = re.compile(r'\[https?://[^\]\s]*(\](\(https?://[^\)\s]*)?)?')
+MAX_HOLD = 512
+
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+PLAIN_RUN = re.compile(r'[^"\\]+')
+
+
+def strip_citations(text):
+    """Same substitutions as PerplexityChatbot._postprocess_answer."""
+    text = CITATION.sub('', text)
+    return MARKDOWN_LINK.sub(r"https://\1", text)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class CitationStripper:
+    """Incremental strip_citations. A trailing '[' is held back until it is
+    clear whether it opens a [n] mark or a [url](url) link."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def _held_from(self):
+        i = self.buffer.rfind("[")
+        if i == -1 or len(self.buffer) - i > MAX_HOLD:
+            return len(self.buffer)
+        tail = self.buffer[i:]
+        if (PARTIAL_CITATION.fullmatch(tail) or PARTIAL_MARKDOWN_LINK.fullmatch(tail)
+                or "https://".startswith(tail[1:]) or "http://".startswith(tail[1:])):
+            return i
+        return len(self.buffer)
+
+    def feed(self, text):
+        self.buffer += text
+        cut = self._held_from()
+        ready, self.buffer = self.buffer[:cut], self.buffer[cut:]
+        return strip_citations(ready)
+
+    def flush(self):
+        ready, self.buffer = self.buffer, ""
+        return strip_citations(ready)
+
+
+class JsonStringField:
+    """Decodes one string field of a JSON object while the object is still arriving,
+    e.g. the "answer" of {"answer": "...", "links": [...]}."""
+
+    def __init__(self, field):
+        self.key = f'"{field}"'
+        self.state = "key"
+        self.pending = ""
+
+    def feed(self, text):
+        self.pending += text
+        out = []
+        while self.pending and self.state != "done":
+            if self.state == "key":
+                i = self.pending.find(self.key)
+                if i == -1:
+                    self.pending = self.pending[-(len(self.key) - 1):]
+                    break
+                self.pending = self.pending[i + len(self.key):]
+                self.state = "colon"
+            elif self.state in ("colon", "quote"):
+                self.pending = self.pending.lstrip()
+                if not self.pending:
+                    break
+                expected = ":" if self.state == "colon" else '"'
+                if self.pending[0] != expected:
+                    # Not the field after all (e.g. the word appeared inside another value).
+                    self.state = "key"
+                    continue
+                self.pending = self.pending[1:]
+                self.state = "quote" if self.state == "colon" else "value"
+            else:
+                self._decode(out)
+        return "".join(out)
+
+    def _decode(self, out):
+        text = self.pending
+        i = 0
+        while i < len(text):
+            run = PLAIN_RUN.match(text, i)
+            if run:
+                out.append(run.group())
+                i = run.end()
+                continue
+            if text[i] == '"':
+                self.state = "done"
+                i += 1
+                break
+            # Backslash escape; wait for the rest of it if it is split across deltas.
+            if i + 1 >= len(text):
+                break
+            escape = text[i + 1]
+            if escape != "u":
+                out.append(JSON_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(text):
+                break
+            code = int(text[i + 2:i + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                if i + 12 > len(text):
+                    break
+                low = int(text[i + 8:i + 12], 16)
+                code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                i += 6
+            out.append(chr(code))
+            i += 6
+        self.pending = text[i:]
+
+
+class AnswerStream:
+    """Turns the raw deltas of a chatbot completion into display text.
+
+    The model replies with a JSON object; only its "answer" value is relayed,
+    with citations stripped. The raw text is kept so the complete reply can
+    still go through PerplexityChatbot.parse_answer at the end.
+    """
+
+    def __init__(self, field="answer"):
+        self.field = JsonStringField(field)
+        self.stripper = CitationStripper()
+        self.parts = []
+
+    @property
+    def raw(self):
+        return "".join(self.parts)
+
+    def feed(self, delta):
+        self.parts.append(delta)
+        return self.stripper.feed(self.field.feed(delta))
+
+    def flush(self):
+        return self.stripper.flush()
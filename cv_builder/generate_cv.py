@@ -1,28 +1,18 @@
 #call perplexity
-import requests
 import os
 from dotenv import load_dotenv
+from llm_client import get_client
 
 load_dotenv()
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
-def call_perplexity(prompt):
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
+def build_payload(prompt):
+    return {
         "model": "sonar",
         "messages": [
             {"role": "user", "content": prompt}
         ]
     }
 
-    response = requests.post(url, json=payload, headers=headers)
-
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        raise Exception(f"Perplexity API Error: {response.status_code} {response.text}")
+def call_perplexity(prompt):
+    return get_client().chat_content(build_payload(prompt), PERPLEXITY_API_KEY)
@@ -117,4 +117,30 @@ User Data:
 {user_data}
 """
 
-    return prompt
\ No newline at end of file
+    return prompt
+
+def build_prompt_cover_letter(user_data):
+    cover_letter_format = """
+                                Full Name\n
+                                Location\n
+                                Phone number (in +countryCode-number format, eg, +44-1234567890)\n
+                                Email\n\n
+
+                                Today's Date in MM dd, yyyy format (where MM is the full month name)\n\n
+
+                                Dear Hiring Manager (or title.+name of the recruiter if provided, eg, Mr. Smith),\n
+
+                                Opening Paragraph\n
+                                Body Paragraph(s)\n
+                                Closing Paragraph\n\n
+
+                                Sincerely,\n
+                                Full Name           
+                               """
+
+    return (
+        "Using the CV information below and the job description, create a professional cover letter:\n\n"
+        f"CV information:\n{user_data}\n\nJob Description:\n{user_data['job_description']}\n\n"
+        "State role/source, align 2-3 key skills with examples, show company insight, conclude with interview request. Make it highly ATS-friendly, and have a human written tone."
+        f"Make sure to use this format:\n {cover_letter_format}"
+    )
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+PERPLEXITY_API_BASE = os.getenv("PERPLEXITY_API_BASE", "https://api.perplexity.ai")
+
+# (connect, read) timeouts in seconds per endpoint. Chat completions can legitimately
+# take a while to generate; the connect timeout is what catches a dead upstream.
+TIMEOUTS = {
+    "chat": (
+        float(os.getenv("PERPLEXITY_CONNECT_TIMEOUT", 3.05)),
+        float(os.getenv("PERPLEXITY_CHAT_READ_TIMEOUT", 60)),
+    ),
+    "transcription": (
+        float(os.getenv("PERPLEXITY_CONNECT_TIMEOUT", 3.05)),
+        float(os.getenv("PERPLEXITY_TRANSCRIBE_READ_TIMEOUT", 120)),
+    ),
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt, retry_after=None, base=0.5, maximum=8.0):
+    """Full-jitter exponential backoff, or the server's Retry-After when it gives one."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), maximum)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def sse_delta(line):
+    """Content delta from one line of an OpenAI-style SSE stream; None for anything else."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    choices = json.loads(data).get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or None
+
+
+class LLMError(Exception):
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class CircuitOpenError(LLMError):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling the upstream after repeated failures, then lets one probe through."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self._probing):
+                raise CircuitOpenError("Perplexity API circuit is open; skipping call")
+            if state == "half-open":
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    """Pooled keep-alive client for the Perplexity API.
+
+    One requests.Session per process keeps TLS connections open between calls.
+    429/5xx responses and connection errors are retried with full-jitter exponential
+    backoff (honouring Retry-After), and a circuit breaker fails fast while the
+    upstream is down instead of tying up every worker on timeouts.
+    """
+
+    def __init__(self, base_url=PERPLEXITY_API_BASE, pool_size=20, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeouts=None, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeouts = timeouts or TIMEOUTS
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        return backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max)
+
+    def request(self, endpoint, path, api_key, **kwargs):
+        url = f"{self.base_url}{path}"
+        headers = {"Authorization": f"Bearer {api_key}"}
+        headers.update(kwargs.pop("headers", {}))
+
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            response = None
+            try:
+                response = self.session.post(url, headers=headers, timeout=self.timeouts[endpoint], **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise LLMError(f"Perplexity API unreachable: {e}")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    break
+                time.sleep(self._backoff(attempt, response))
+                continue
+
+            # Anything else is an answer from a healthy upstream, even a 4xx.
+            self.breaker.record_success()
+            break
+
+        if response.status_code != 200:
+            raise LLMError(f"Perplexity API Error: {response.status_code} {response.text}",
+                           status_code=response.status_code, body=response.text)
+        return response
+
+    def chat_completion(self, payload, api_key):
+        return self.request("chat", "/chat/completions", api_key, json=payload).json()
+
+    def chat_content(self, payload, api_key):
+        return self.chat_completion(payload, api_key)["choices"][0]["message"]["content"]
+
+    def stream_chat_content(self, payload, api_key):
+        """Yield content deltas of a streamed completion. Retries only apply before the first byte."""
+        payload = dict(payload, stream=True)
+        response = self.request("chat", "/chat/completions", api_key, json=payload, stream=True)
+        with response:
+            for line in response.iter_lines():
+                delta = sse_delta(line)
+                if delta:
+                    yield delta
+
+    def transcribe(self, filename, data, mimetype, api_key):
+        # Bytes rather than a stream, so a retried request can resend the file.
+        return self.request("transcription", "/audio/transcriptions", api_key,
+                            files={"file": (filename, data, mimetype)}).json()
+
+
+class AsyncLLMClient:
+    """asyncio counterpart of LLMClient for the ASGI serving path (see asgi.py).
+
+    Same timeouts, retry policy and circuit breaker semantics, on a pooled
+    aiohttp session so one event loop can keep hundreds of calls in flight.
+    Create one per event loop and close() it on shutdown.
+    """
+
+    def __init__(self, base_url=PERPLEXITY_API_BASE, pool_size=200, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeouts=None, breaker=None):
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeouts = {
+            endpoint: aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            for endpoint, (connect, read) in (timeouts or TIMEOUTS).items()
+        }
+        self.breaker = breaker or CircuitBreaker()
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=pool_size))
+
+    async def request(self, endpoint, path, api_key, **kwargs):
+        """POST and return (status, body_text). Raises LLMError unless the status is 200."""
+        url = f"{self.base_url}{path}"
+        headers = {"Authorization": f"Bearer {api_key}"}
+        headers.update(kwargs.pop("headers", {}))
+
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call()
+            try:
+                async with self.session.post(url, headers=headers, timeout=self.timeouts[endpoint], **kwargs) as response:
+                    status, text = response.status, await response.text()
+                    retry_after = response.headers.get("Retry-After")
+            except (self._aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise LLMError(f"Perplexity API unreachable: {e!r}")
+                await asyncio.sleep(backoff_delay(attempt, None, self.backoff_base, self.backoff_max))
+                continue
+
+            if status in RETRY_STATUSES:
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    break
+                await asyncio.sleep(backoff_delay(attempt, retry_after, self.backoff_base, self.backoff_max))
+                continue
+
+            self.breaker.record_success()
+            break
+
+        if status != 200:
+            raise LLMError(f"Perplexity API Error: {status} {text}", status_code=status, body=text)
+        return text
+
+    async def chat_completion(self, payload, api_key):
+        return json.loads(await self.request("chat", "/chat/completions", api_key, json=payload))
+
+    async def chat_content(self, payload, api_key):
+        return (await self.chat_completion(payload, api_key))["choices"][0]["message"]["content"]
+
+    async def stream_chat_content(self, payload, api_key):
+        """Async-generator version of LLMClient.stream_chat_content."""
+        payload = dict(payload, stream=True)
+        url = f"{self.base_url}/chat/completions"
+        self.breaker.before_call()
+        try:
+            async with self.session.post(url, headers={"Authorization": f"Bearer {api_key}"},
+                                         timeout=self.timeouts["chat"], json=payload) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    if response.status in RETRY_STATUSES:
+                        self.breaker.record_failure()
+                    raise LLMError(f"Perplexity API Error: {response.status} {text}",
+                                   status_code=response.status, body=text)
+                self.breaker.record_success()
+                async for line in response.content:
+                    delta = sse_delta(line.strip())
+                    if delta:
+                        yield delta
+        except (self._aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            raise LLMError(f"Perplexity API unreachable: {e!r}")
+
+    async def close(self):
+        await self.session.close()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide LLMClient. Recreated after fork so workers never share sockets."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = LLMClient(pool_size=int(os.getenv("PERPLEXITY_POOL_SIZE", 20)),
+                                    max_retries=int(os.getenv("PERPLEXITY_MAX_RETRIES", 3)))
+                _client_pid = os.getpid()
+    return _client
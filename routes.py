@@ -2,36 +2,149 @@ from flask import Blueprint, request, jsonify, current_app, send_file
 from werkzeug.utils import secure_filename
 from models import db, Query  , CVUpload
 from chatbot.chatbot import PerplexityChatbot
-from scholarship_finder.scholarship import build_prompt as scholarship_prompt, fetch_scholarships
+from chatbot.knowledge_base import get_knowledge_base
+from chatbot.answer_cache import create_answer_cache
+from chatbot.similar_cache import SimilarQuestionCache
+from scholarship_finder.scholarship import build_prompt as scholarship_prompt, fetch_scholarships, parse_scholarships
 from sop_builder.sop_builder import generate_sop, save_pdf, save_docx
 from cv_builder.save import save_as_docx  
 from cv_builder.parse_cv import extract_info_from_pdf, extract_info_from_docx, extract_json_object
-from cv_builder.prompt_builder import build_prompt_CV as cv_prompt
+from cv_builder.prompt_builder import build_prompt_CV as cv_prompt, build_prompt_cover_letter as cover_letter_prompt
 from cv_builder.generate_cv import call_perplexity
 from flasgger import swag_from
-import requests
+from llm_client import get_client
 import time
 import json
 import tempfile
 import os
 import re
+import threading
+from datetime import datetime, timezone
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
 bot = None
+_init_lock = threading.Lock()
+answer_cache = None
+_answer_cache_ready = False
+similar_cache = None
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
+SCHOLARSHIP_REQUIRED_FIELDS = ["citizenship", "preferred_country", "level", "field"]
+SOP_REQUIRED_FIELDS = ["name", "country_of_origin", "intended_degree",
+                       "preferred_country", "field_of_study", "preferred_uni"]
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-@bp.before_app_request
-def create_chatbot():
+def missing_fields(data, required_fields):
+    return [f for f in required_fields if not data.get(f)]
+
+def get_bot():
+    # One chatbot (and one knowledge base) per worker process, shared across threads.
+    # The content file is only re-read when it actually changes on disk.
     global bot
-    bot = PerplexityChatbot(
-        api_key=current_app.config.get('PERPLEXITY_API_KEY'),
-        content_file_path=current_app.config.get('CONTENT_FILE')
-    )
+    if bot is None:
+        with _init_lock:
+            if bot is None:
+                content_file = current_app.config.get('CONTENT_FILE') or "inforens_scraped_data.txt"
+                bot = PerplexityChatbot(
+                    api_key=current_app.config.get('PERPLEXITY_API_KEY'),
+                    content_file_path=content_file,
+                    knowledge_base=get_knowledge_base(
+                        content_file,
+                        check_interval=current_app.config.get('CONTENT_RELOAD_INTERVAL', 5.0),
+                        chunk_chars=current_app.config.get('RETRIEVAL_CHUNK_CHARS', 1200),
+                        index_path=current_app.config.get('CONTENT_INDEX_FILE')
+                    ),
+                    context_mode=current_app.config.get('CHATBOT_CONTEXT_MODE', 'retrieval'),
+                    top_k=current_app.config.get('RETRIEVAL_TOP_K', 8),
+                    token_budget=current_app.config.get('RETRIEVAL_TOKEN_BUDGET', 3000)
+                )
+    bot.knowledge_base.refresh()
+    return bot
+
+def get_answer_cache():
+    # None when ANSWER_CACHE_BACKEND=none, so callers must check.
+    global answer_cache, _answer_cache_ready
+    if not _answer_cache_ready:
+        with _init_lock:
+            if not _answer_cache_ready:
+                answer_cache = create_answer_cache(current_app.config)
+                _answer_cache_ready = True
+    return answer_cache
+
+def get_similar_cache(chatbot):
+    # None when SIMILAR_CACHE_ENABLED is off. Seeded once per process with thumbs-up
+    # answers given since the current content file was written.
+    global similar_cache
+    if not current_app.config.get('SIMILAR_CACHE_ENABLED', True):
+        return None
+    if similar_cache is None:
+        with _init_lock:
+            if similar_cache is None:
+                cache = SimilarQuestionCache(
+                    threshold=current_app.config.get('SIMILAR_CACHE_THRESHOLD', 0.9),
+                    max_entries=current_app.config.get('SIMILAR_CACHE_MAX_ENTRIES', 2000)
+                )
+                _seed_similar_cache(cache, chatbot)
+                similar_cache = cache
+    return similar_cache
+
+def _seed_similar_cache(cache, chatbot):
+    kb = chatbot.knowledge_base
+    try:
+        rows = Query.query.filter(
+            Query.thumbs_up.is_(True),
+            Query.success.is_(True),
+            Query.answer.isnot(None)
+        )
+        if kb.content_mtime:
+            rows = rows.filter(Query.asked_at >= datetime.fromtimestamp(kb.content_mtime, timezone.utc))
+        rows = rows.order_by(Query.asked_at.desc()).limit(current_app.config.get('SIMILAR_CACHE_SEED_LIMIT', 500)).all()
+    except Exception as e:
+        current_app.logger.warning(f"Could not seed similar-question cache: {e}")
+        return
+
+    # Query rows keep the answer text only, so links are re-derived from the
+    # retrieval sources for the same question.
+    seeds = []
+    for row in reversed(rows):  # oldest first, so the newest are the last to be evicted
+        _context, urls = kb.select_context(row.question, chatbot.top_k, chatbot.token_budget)
+        seeds.append((row.question, {"answer": row.answer, "links": urls[:5]}))
+    cache.seed(seeds, kb.content_hash)
+
+def lookup_cached_answer(chatbot, question, mode):
+    """Check the exact and near-duplicate answer caches. Returns (answer, model) or (None, None)."""
+    content_hash = chatbot.knowledge_base.content_hash
+    cache = get_answer_cache()
+    if cache:
+        answer = cache.get(question, content_hash, mode)
+        if answer is not None:
+            return answer, "cache"
+    similar = get_similar_cache(chatbot)
+    if similar:
+        match = similar.lookup(question, content_hash)
+        if match:
+            return match[0], "cache-similar"
+    return None, None
+
+def remember_answer(chatbot, question, mode, answer):
+    if not isinstance(answer, dict):
+        return
+    content_hash = chatbot.knowledge_base.content_hash
+    cache = get_answer_cache()
+    if cache:
+        cache.set(question, content_hash, answer, mode)
+    similar = get_similar_cache(chatbot)
+    if similar:
+        similar.add(question, answer, content_hash)
+
+def log_query(**fields):
+    query = Query(**fields)
+    db.session.add(query)
+    db.session.commit()
+    return query.id
 
 # @bp.after_request
 # def add_cors_headers(response):
@@ -49,37 +162,44 @@ def ask():
     question = (data.get("question") or "").strip()
     session_id = data.get("sessionId")
     user_id = data.get("userId")
+    context_mode = data.get("contextMode")
 
     if not question:
         return jsonify({"error": "Question is required"}), 400
+    if context_mode and context_mode not in PerplexityChatbot.CONTEXT_MODES:
+        return jsonify({"error": "contextMode must be 'retrieval' or 'full'"}), 400
 
     ip = request.headers.get("X-Forwarded-For", request.remote_addr)
     ua = request.headers.get("User-Agent")
 
     try:
-        raw_answer = bot.ask_question(question)
+        chatbot = get_bot()
+        mode = context_mode or chatbot.context_mode
+
+        raw_answer, model = lookup_cached_answer(chatbot, question, mode)
+        if raw_answer is None:
+            raw_answer = chatbot.ask_question(question, context_mode=mode)
+            model = "perplexity-sonar"
+            remember_answer(chatbot, question, mode, raw_answer)
         latency_ms = int((time.time() - start) * 1000)
 
-        query = Query(
+        message_id = log_query(
             session_id=session_id,
             user_id=user_id,
             question=question,
             answer=raw_answer["answer"],
-            model="perplexity-sonar",
+            model=model,
             latency_ms=latency_ms,
             success=True,
             ip_address=ip,
             user_agent=ua,
         )
 
-        db.session.add(query)
-        db.session.commit()
-
         return jsonify({
             "answer": raw_answer["answer"],
             "links": raw_answer["links"],
             "latencyMs": latency_ms,
-            "messageId": query.id
+            "messageId": message_id
         })
 
     except Exception as e:
@@ -87,6 +207,20 @@ def ask():
         current_app.logger.error(f"Error during ask: {e}")
         return jsonify({"error": f"Failed to get answer: {str(e)}"}), 500
 
+@bp.route('/kb/stats', methods=['GET'])
+@swag_from('specs/api_spec.yaml', endpoint='api.kb_stats')
+def kb_stats():
+    return jsonify(get_bot().knowledge_base.stats())
+
+@bp.route('/cache/stats', methods=['GET'])
+@swag_from('specs/api_spec.yaml', endpoint='api.cache_stats')
+def cache_stats():
+    cache = get_answer_cache()
+    stats = cache.stats() if cache else {"backend": None}
+    similar = get_similar_cache(get_bot())
+    stats["similar"] = similar.stats() if similar else None
+    return jsonify(stats)
+
 @bp.route('/feedback', methods=['POST'])
 @swag_from('specs/api_spec.yaml', endpoint='api.feedback')
 def feedback():
@@ -120,12 +254,13 @@ def feedback():
 def transcribe():
     try:
         audio_file = request.files["file"]
-        response = requests.post(
-            "https://api.perplexity.ai/audio/transcriptions",
-            headers={"Authorization": f"Bearer {current_app.config.get('PERPLEXITY_API_KEY')}"},
-            files={"file": (audio_file.filename, audio_file, audio_file.mimetype)},
+        result = get_client().transcribe(
+            audio_file.filename,
+            audio_file.read(),
+            audio_file.mimetype,
+            current_app.config.get('PERPLEXITY_API_KEY')
         )
-        return jsonify(response.json())
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -134,21 +269,16 @@ def transcribe():
 def scholarships():
     try:
         data = request.get_json(silent=True) or {}
-        required_fields = ["citizenship", "preferred_country", "level", "field"]
 
-        missing = [f for f in required_fields if not data.get(f)]
+        missing = missing_fields(data, SCHOLARSHIP_REQUIRED_FIELDS)
         if missing:
             return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
 
         prompt = scholarship_prompt(data)
         results = fetch_scholarships(prompt)  
 
-        results = extract_json_object(results)
-
-        scholarships_data = json.loads(results)
-
         return jsonify({
-            "scholarships": scholarships_data["scholarships"],  
+            "scholarships": parse_scholarships(results),  
             "prompt": prompt
         })
 
@@ -161,10 +291,8 @@ def scholarships():
 def sop():
     try:
         data = request.get_json(silent=True) or {}
-        required_fields = ["name", "country_of_origin", "intended_degree", 
-                           "preferred_country", "field_of_study", "preferred_uni"]
 
-        missing = [f for f in required_fields if not data.get(f)]
+        missing = missing_fields(data, SOP_REQUIRED_FIELDS)
         if missing:
             return jsonify({"error": f"Missing required fields: {', '.join(missing)}"}), 400
 
@@ -300,34 +428,10 @@ def generate_cover_letter():
             return {"error": "JSON body required"}, 400
 
         user_data = _extract_user_data(data, "existing")
-        cover_letter_format = """
-                                Full Name\n
-                                Location\n
-                                Phone number (in +countryCode-number format, eg, +44-1234567890)\n
-                                Email\n\n
-
-                                Today's Date in MM dd, yyyy format (where MM is the full month name)\n\n
-
-                                Dear Hiring Manager (or title.+name of the recruiter if provided, eg, Mr. Smith),\n
-
-                                Opening Paragraph\n
-                                Body Paragraph(s)\n
-                                Closing Paragraph\n\n
-
-                                Sincerely,\n
-                                Full Name           
-                               """
-
         if not user_data:
             return {"error": "user_data is required"}, 400
 
-        cover_prompt = (
-            "Using the CV information below and the job description, create a professional cover letter:\n\n"
-            f"CV information:\n{user_data}\n\nJob Description:\n{user_data['job_description']}\n\n"
-            "State role/source, align 2-3 key skills with examples, show company insight, conclude with interview request. Make it highly ATS-friendly, and have a human written tone."
-            f"Make sure to use this format:\n {cover_letter_format}"
-        )
-
+        cover_prompt = cover_letter_prompt(user_data)
         generated_cover_letter = call_perplexity(cover_prompt)
 
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".docx")
@@ -1,4 +1,6 @@
-import requests
+import json
+from llm_client import get_client
+from cv_builder.parse_cv import extract_json_object
 
 def get_user_details():
     print("Please enter your details below.")
@@ -88,28 +90,20 @@ Ensure the JSON you return is syntactically valid and parseable.
 
     return "\n".join(lines)
 
-def fetch_scholarships(prompt):
-    from flask import current_app
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {current_app.config.get("PERPLEXITY_API_KEY")}",
-        "Content-Type": "application/json"
-    }
-    payload = {
+def build_payload(prompt):
+    return {
         "model": "sonar",
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": 1000,
         "reasoning_effort": "medium"
     }
 
-    response = requests.post(url, json=payload, headers=headers)
+def fetch_scholarships(prompt):
+    from flask import current_app
+    return get_client().chat_content(build_payload(prompt), current_app.config.get("PERPLEXITY_API_KEY"))
 
-    if response.status_code == 200:
-        data = response.json()
-        output = data["choices"][0]["message"]["content"]
-        return output
-    else:
-        raise Exception(f"Error {response.status_code}: {response.text}")
+def parse_scholarships(output):
+    return json.loads(extract_json_object(output))["scholarships"]
 
 if __name__ == "__main__":
     user_data = get_user_details()
@@ -1,9 +1,9 @@
-import requests  # for perplexity
 from fpdf import FPDF  # to download sop as pdf
 from docx import Document  # to download sop as doc
 import re
 import os
 import PyPDF2  # for cv upload and parsing
+from llm_client import get_client  # for perplexity
 
 # === Extraction helpers ===
 
@@ -160,19 +160,18 @@ def build_sop_prompt(user_inputs):
         
     return base_prompt.strip()
 
-def call_perplexity_api(prompt, token):
-    url = "https://api.perplexity.ai/chat/completions"
-    payload = {
+def build_sop_payload(prompt):
+    return {
         "model": "sonar",
         "messages": [{"role": "user", "content": prompt}],
         "max_tokens": 2048
     }
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(url, json=payload, headers=headers)
-    return response.json()
+
+def call_perplexity_api(prompt, token):
+    return get_client().chat_completion(build_sop_payload(prompt), token)
+
+def sop_from_response(response):
+    return response.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
 
 # === Exported function for API use ===
 
@@ -180,8 +179,7 @@ def generate_sop(user_inputs, token):
     """CORE function for Flask API, returns (sop, prompt)"""
     prompt = build_sop_prompt(user_inputs)
     response = call_perplexity_api(prompt, token)
-    sop = response.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-    return sop, prompt
+    return sop_from_response(response), prompt
 
 # === PDF/DOCX helpers (not usually in API, but retained for CLI or download endpoint) ===
 